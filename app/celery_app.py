@@ -0,0 +1,25 @@
+from celery import Celery
+from .config import settings
+
+# Tasks are registered from app.tasks by the worker; the API process only
+# needs this app to send tasks by name and read their results
+celery_app = Celery(
+    "tasks",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=['app.tasks']
+)
+
+celery_app.conf.update(
+    task_track_started=True,
+    task_serializer='json',
+    result_serializer='json',
+    accept_content=['json'],
+    timezone='UTC',
+    enable_utc=True,
+)
+
+
+def progress_channel(task_id: str) -> str:
+    """Redis pub/sub channel carrying progress events for a task"""
+    return f"task-progress:{task_id}"
@@ -0,0 +1,120 @@
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only .gz variants are built
+    brotli = None
+
+# Tried in order of preference: (Content-Encoding, file suffix)
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def precompress_static(directory: str, min_size: int = 512):
+    """
+    Write .gz (and .br when brotli is installed) siblings for static files
+    Only missing or stale variants are rebuilt; run as a build step with
+    `python -m app.compression [directory]`
+    """
+    compressors = {'.gz': lambda data: gzip.compress(data, compresslevel=9)}
+    if brotli is not None:
+        compressors['.br'] = lambda data: brotli.compress(data, quality=11)
+
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(('.gz', '.br')):
+                continue
+
+            path = os.path.join(root, name)
+            if os.path.getsize(path) < min_size:
+                continue
+
+            mtime = os.path.getmtime(path)
+            for suffix, compress in compressors.items():
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+                    continue
+
+                with open(path, 'rb') as f:
+                    data = compress(f.read())
+                # Write then rename so concurrent workers never serve a partial file
+                tmp_path = f"{target}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, target)
+
+
+def _parse_accept_encoding(header: str) -> dict:
+    """Map each Accept-Encoding token to its q-value"""
+    preferences = {}
+    for part in header.split(','):
+        token, *params = part.split(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        preferences[token] = quality
+    return preferences
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """Serve a pre-built .br/.gz variant of a static file when the client accepts it"""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        preferences = _parse_accept_encoding(Headers(scope=scope).get('accept-encoding', ''))
+
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            # An explicit q=0 (or a q=0 wildcard) rules the encoding out
+            if preferences.get(encoding, preferences.get('*', 0.0)) <= 0:
+                continue
+            try:
+                response = await super().get_response(path + suffix, scope)
+            except HTTPException:
+                continue
+
+            # Content-Type is still guessed from the original name (style.css.gz -> text/css)
+            response.headers['Content-Encoding'] = encoding
+            response.headers['Vary'] = 'Accept-Encoding'
+            return response
+
+        # The chosen variant depends on Accept-Encoding, so caches must vary on it
+        response = await super().get_response(path, scope)
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """
+    GZip responses except under the excluded path prefixes
+    Used to skip SSE streams, which gzip would buffer, and pre-compressed files
+    """
+
+    def __init__(self, app, exclude_prefixes: tuple = (), **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_prefixes = exclude_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+if __name__ == "__main__":
+    import sys
+
+    precompress_static(sys.argv[1] if len(sys.argv) > 1 else "static")
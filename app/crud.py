@@ -1,25 +1,18 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
-from typing import List, Optional
+from sqlalchemy import Float, cast, func, or_, select, text
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Optional, Tuple
 from . import models, schemas
 
 def get_product(db: Session, product_id: int) -> Optional[models.Product]:
     return db.query(models.Product).filter(models.Product.id == product_id).first()
 
-def get_product_by_sku(db: Session, sku: str) -> Optional[models.Product]:
-    return db.query(models.Product).filter(
-        func.upper(models.Product.sku) == sku.upper()
-    ).first()
-
-def get_products(
-    db: Session, 
-    skip: int = 0, 
-    limit: int = 100,
+def _filter_products(
+    query,
     search: Optional[str] = None,
     is_active: Optional[bool] = None
-) -> List[models.Product]:
-    query = db.query(models.Product)
-    
+):
     if search:
         search_filter = f"%{search}%"
         query = query.filter(
@@ -33,35 +26,61 @@ def get_products(
     if is_active is not None:
         query = query.filter(models.Product.is_active == is_active)
     
-    return query.offset(skip).limit(limit).all()
+    return query
+
+# Plain column selects skip ORM identity-map and instrumentation overhead;
+# price is cast to float so the driver never builds Decimal objects
+_PRODUCT_LIST_COLUMNS = (
+    models.Product.id,
+    models.Product.sku,
+    models.Product.name,
+    models.Product.description,
+    cast(models.Product.price, Float).label('price'),
+    models.Product.is_active,
+    models.Product.created_at,
+    models.Product.updated_at,
+)
 
 def get_products_count(
     db: Session,
     search: Optional[str] = None,
     is_active: Optional[bool] = None
 ) -> int:
-    query = db.query(func.count(models.Product.id))
-    
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            or_(
-                models.Product.sku.ilike(search_filter),
-                models.Product.name.ilike(search_filter),
-                models.Product.description.ilike(search_filter)
-            )
-        )
+    query = _filter_products(db.query(func.count(models.Product.id)), search, is_active)
+    return query.scalar()
+
+def get_products_page(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    search: Optional[str] = None,
+    is_active: Optional[bool] = None
+) -> Tuple[List[RowMapping], int]:
+    """Fetch a page of products and the total match count in one query"""
+    stmt = _filter_products(
+        select(*_PRODUCT_LIST_COLUMNS, func.count().over().label('total')),
+        search,
+        is_active
+    )
+    rows = db.execute(stmt.offset(skip).limit(limit)).mappings().all()
     
-    if is_active is not None:
-        query = query.filter(models.Product.is_active == is_active)
+    if not rows:
+        # Window count is unavailable when the page is past the last row
+        total = get_products_count(db, search, is_active) if skip else 0
+        return [], total
     
-    return query.scalar()
+    return rows, rows[0]['total']
 
-def create_product(db: Session, product: schemas.ProductCreate) -> models.Product:
-    db_product = models.Product(**product.model_dump())
-    db.add(db_product)
+def create_product(db: Session, product: schemas.ProductCreate) -> Optional[models.Product]:
+    """Insert a product; returns None if the SKU already exists"""
+    stmt = (
+        insert(models.Product)
+        .values(**product.model_dump())
+        .on_conflict_do_nothing()
+        .returning(models.Product)
+    )
+    db_product = db.scalars(stmt).first()
     db.commit()
-    db.refresh(db_product)
     return db_product
 
 def update_product(
@@ -87,9 +106,29 @@ def delete_product(db: Session, product_id: int) -> bool:
     return False
 
 def delete_all_products(db: Session) -> int:
-    count = db.query(models.Product).delete()
+    """
+    Remove every product with TRUNCATE; returns the planner's row estimate
+    Falls back to DELETE if another table references products by foreign key
+    """
+    stats = db.execute(text("""
+        SELECT c.reltuples::bigint AS estimate,
+               EXISTS (
+                   SELECT 1 FROM pg_constraint
+                   WHERE contype = 'f' AND confrelid = c.oid
+               ) AS referenced
+        FROM pg_class c
+        WHERE c.oid = 'products'::regclass
+    """)).one()
+    
+    if stats.referenced:
+        count = db.query(models.Product).delete()
+        db.commit()
+        return count
+    
+    db.execute(text("TRUNCATE products RESTART IDENTITY"))
     db.commit()
-    return count
+    # reltuples is -1 for a table that has never been analyzed
+    return max(stats.estimate, 0)
 
 # Webhook CRUD operations
 def create_webhook(db: Session, webhook: schemas.WebhookCreate) -> models.Webhook:
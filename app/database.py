@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
@@ -22,5 +22,15 @@ def get_db():
         db.close()
 
 def init_db():
-    """Initialize database tables"""
+    """Initialize database extensions, tables and indexes"""
+    from . import models
+    
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
     Base.metadata.create_all(bind=engine)
+    
+    # create_all only builds indexes alongside new tables, so indexes added
+    # to the models later are created here for tables that already exist
+    with engine.begin() as conn:
+        for index in models.Product.__table__.indexes:
+            index.create(bind=conn, checkfirst=True)
@@ -1,28 +1,47 @@
 from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Query, Request
-from fastapi.responses import StreamingResponse, HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import asyncio
-import json
+import aiofiles
+import anyio
+import orjson
 import os
-import shutil
 from pathlib import Path
+from redis import asyncio as aioredis
+from sse_starlette.sse import EventSourceResponse
 
+from .compression import PrecompressedStaticFiles, SelectiveGZipMiddleware
 from .database import get_db, init_db
-from .tasks import celery_app, import_products_task
+from .celery_app import celery_app, progress_channel
 from . import models, schemas, crud
 from .config import settings
 
-app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG)
+app = FastAPI(
+    title=settings.APP_NAME,
+    debug=settings.DEBUG,
+    default_response_class=ORJSONResponse
+)
+
+# Compress dynamic responses; progress streams and static files are excluded
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=512,
+    exclude_prefixes=("/api/progress/", "/static/")
+)
+
+# Shared async Redis client for progress subscriptions
+redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
 
 # Create upload directory
 Path(settings.UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
 
 # Setup templates and static files
 templates = Jinja2Templates(directory="templates")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Static .gz/.br variants are built ahead of time: python -m app.compression
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 
 # Initialize database on startup
 @app.on_event("startup")
@@ -35,6 +54,8 @@ async def root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 # File Upload Endpoint
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
 @app.post("/api/upload", response_model=schemas.UploadResponse)
 async def upload_csv(
     file: UploadFile = File(...),
@@ -50,16 +71,25 @@ async def upload_csv(
     # Save uploaded file
     file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
     
+    # Stream to disk in chunks so the event loop stays responsive
+    size = 0
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise HTTPException(status_code=413, detail="File too large")
+                await buffer.write(chunk)
+    except HTTPException:
+        os.remove(file_path)
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
     finally:
-        file.file.close()
+        await file.close()
     
     # Trigger Celery task
-    task = import_products_task.delay(file_path)
+    task = celery_app.send_task('tasks.import_products', args=[file_path])
     
     return schemas.UploadResponse(
         task_id=task.id,
@@ -67,57 +97,90 @@ async def upload_csv(
     )
 
 # Server-Sent Events for progress tracking
+TERMINAL_STATES = ('SUCCESS', 'FAILURE')
+
+# Fallback polling bounds (seconds) for when no progress event is pushed;
+# pub/sub delivers updates, polling only catches lost events
+PROGRESS_POLL_MIN = 0.5
+PROGRESS_POLL_MAX = 5.0
+
+def get_task_progress(task_id: str) -> dict:
+    """Build a progress event from the task's stored result"""
+    task = celery_app.AsyncResult(task_id)
+    
+    data = {
+        'task_id': task_id,
+        'state': task.state,
+    }
+    
+    if task.state == 'PENDING':
+        data.update({
+            'status': 'Waiting to start...',
+            'percent': 0
+        })
+    elif task.state == 'PROGRESS':
+        data.update(task.info)
+    elif task.state == 'SUCCESS':
+        data.update({
+            'status': 'Complete!',
+            'percent': 100,
+            'result': task.result
+        })
+    elif task.state == 'FAILURE':
+        data.update({
+            'status': 'Failed',
+            'error': str(task.info)
+        })
+    
+    return data
+
 @app.get("/api/progress/{task_id}")
 async def stream_progress(task_id: str):
     """
     Stream real-time progress updates using Server-Sent Events
     """
     async def event_generator():
-        while True:
-            task = celery_app.AsyncResult(task_id)
-            
-            data = {
-                'task_id': task_id,
-                'state': task.state,
-            }
+        pubsub = redis_client.pubsub()
+        try:
+            # Subscribe first so no event is missed between snapshot and listen
+            await pubsub.subscribe(progress_channel(task_id))
             
-            if task.state == 'PENDING':
-                data.update({
-                    'status': 'Waiting to start...',
-                    'percent': 0
-                })
-            elif task.state == 'PROGRESS':
-                data.update(task.info)
-            elif task.state == 'SUCCESS':
-                data.update({
-                    'status': 'Complete!',
-                    'percent': 100,
-                    'result': task.result
-                })
-                yield f"data: {json.dumps(data)}\n\n"
-                break
-            elif task.state == 'FAILURE':
-                data.update({
-                    'status': 'Failed',
-                    'error': str(task.info)
-                })
-                yield f"data: {json.dumps(data)}\n\n"
-                break
+            # AsyncResult reads block on Redis, so keep them off the event loop
+            data = await run_in_threadpool(get_task_progress, task_id)
+            yield {"data": orjson.dumps(data, default=str).decode()}
+            delay = PROGRESS_POLL_MIN
             
-            yield f"data: {json.dumps(data)}\n\n"
-            await asyncio.sleep(0.5)
+            while data['state'] not in TERMINAL_STATES:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=delay)
+                if message:
+                    payload = message['data']
+                    update = orjson.loads(payload)
+                else:
+                    # Nothing pushed: poll in case an event was lost, backing off while idle
+                    update = await run_in_threadpool(get_task_progress, task_id)
+                    payload = None
+                    delay = min(delay * 1.5, PROGRESS_POLL_MAX) if update == data else PROGRESS_POLL_MIN
+                
+                # Only emit frames that carry a change
+                if update == data:
+                    continue
+                
+                data = update
+                yield {"data": payload or orjson.dumps(data, default=str).decode()}
+        finally:
+            # Shield cleanup from the disconnect cancellation so the
+            # subscribed connection is always released
+            with anyio.CancelScope(shield=True):
+                await pubsub.unsubscribe()
+                await pubsub.aclose()
     
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
-    )
+    # Periodic pings keep proxies from dropping idle connections mid-import
+    return EventSourceResponse(event_generator(), ping=15)
 
 # Product CRUD Endpoints
+# Validates and serializes whole pages in pydantic-core instead of per item
+PRODUCT_LIST_ADAPTER = TypeAdapter(List[schemas.ProductRead])
+
 @app.get("/api/products", response_model=dict)
 def list_products(
     skip: int = Query(0, ge=0),
@@ -126,14 +189,16 @@ def list_products(
     is_active: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
-    products = crud.get_products(db, skip=skip, limit=limit, search=search, is_active=is_active)
-    total = crud.get_products_count(db, search=search, is_active=is_active)
+    products, total = crud.get_products_page(db, skip=skip, limit=limit, search=search, is_active=is_active)
     
     return {
         "total": total,
         "skip": skip,
         "limit": limit,
-        "items": [schemas.Product.model_validate(p) for p in products]
+        "items": PRODUCT_LIST_ADAPTER.dump_python(
+            PRODUCT_LIST_ADAPTER.validate_python(products, from_attributes=True),
+            mode='json'
+        )
     }
 
 @app.get("/api/products/{product_id}", response_model=schemas.Product)
@@ -145,12 +210,11 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
 
 @app.post("/api/products", response_model=schemas.Product, status_code=201)
 def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)):
-    # Check if SKU already exists
-    existing = crud.get_product_by_sku(db, product.sku)
-    if existing:
+    # The insert skips conflicting SKUs, so no separate lookup is needed
+    created = crud.create_product(db, product)
+    if not created:
         raise HTTPException(status_code=400, detail="SKU already exists")
-    
-    return crud.create_product(db, product)
+    return created
 
 @app.put("/api/products/{product_id}", response_model=schemas.Product)
 def update_product(
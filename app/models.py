@@ -15,8 +15,15 @@ class Product(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Create case-insensitive unique index on SKU
+    # Trigram indexes serve the ILIKE '%...%' product search (requires pg_trgm)
     __table_args__ = (
         Index('idx_sku_upper', func.upper(sku), unique=True),
+        Index('idx_product_sku_trgm', sku, postgresql_using='gin',
+              postgresql_ops={'sku': 'gin_trgm_ops'}),
+        Index('idx_product_name_trgm', name, postgresql_using='gin',
+              postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('idx_product_description_trgm', description, postgresql_using='gin',
+              postgresql_ops={'description': 'gin_trgm_ops'}),
     )
     
     def __repr__(self):
@@ -25,6 +25,10 @@ class Product(ProductBase):
     class Config:
         from_attributes = True
 
+class ProductRead(Product):
+    # List views read price as float; Decimal is kept for single-item reads
+    price: Optional[float] = None
+
 class WebhookBase(BaseModel):
     url: HttpUrl
     event_type: str
@@ -1,30 +1,162 @@
-from celery import Celery, Task
+from celery import Task
 from celery.utils.log import get_task_logger
-import pandas as pd
-from io import StringIO
-import psycopg2
-from sqlalchemy import text
+import asyncio
+from contextlib import closing
+from io import BytesIO
+import json
+import redis
+from .celery_app import celery_app, progress_channel
 from .config import settings
-from .database import SessionLocal
+from .database import SessionLocal, engine
 import os
-import httpx
+
+# pyarrow, psycopg2 extras and httpx are imported inside the functions that use
+# them so that importing this module stays cheap
 
 logger = get_task_logger(__name__)
 
-celery_app = Celery(
-    "tasks",
-    broker=settings.CELERY_BROKER_URL,
-    backend=settings.CELERY_RESULT_BACKEND
-)
+# Progress events are pushed here so SSE clients don't poll the result backend
+redis_client = redis.Redis.from_url(settings.REDIS_URL)
+
+
+def publish_progress(task_id: str, data: dict):
+    """Publish a progress event; delivery is best-effort"""
+    try:
+        redis_client.publish(progress_channel(task_id), json.dumps({'task_id': task_id, **data}))
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish progress for {task_id}: {e}")
+
+
+IMPORT_COLUMNS = ['sku', 'name', 'description', 'price']
+
+# Files of at most SMALL_IMPORT_BYTES and below SMALL_IMPORT_ROWS rows are
+# upserted directly, without a staging table. Their newlines are all counted,
+# giving an upper bound on rows, so a large file can't be loaded whole into memory
+SMALL_IMPORT_ROWS = 5000
+SMALL_IMPORT_BYTES = 1 << 20
+
+# The import is restartable, so skip waiting on WAL flush; prefixed to each
+# path's first statement so it costs no extra round-trip
+ASYNC_COMMIT = "SET LOCAL synchronous_commit = off;"
+
+UPSERT_ON_CONFLICT = """
+    ON CONFLICT (sku) 
+    DO UPDATE SET
+        name = EXCLUDED.name,
+        description = EXCLUDED.description,
+        price = EXCLUDED.price,
+        updated_at = NOW()
+"""
+
 
-celery_app.conf.update(
-    task_track_started=True,
-    task_serializer='json',
-    result_serializer='json',
-    accept_content=['json'],
-    timezone='UTC',
-    enable_utc=True,
-)
+def _csv_convert_options():
+    """Read only the import columns, all as text"""
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+    
+    return pacsv.ConvertOptions(
+        include_columns=IMPORT_COLUMNS,
+        column_types={column: pa.string() for column in IMPORT_COLUMNS},
+        # Only empty fields are NULL, as with the previous COPY settings
+        null_values=[''],
+        strings_can_be_null=True,
+    )
+
+
+def _csv_parse_options():
+    """Allow quoted values (e.g. descriptions) to span lines"""
+    from pyarrow import csv as pacsv
+    
+    # Costs some parsing throughput, but without it a multi-line value that
+    # crosses a block boundary desyncs the streaming reader's chunker
+    return pacsv.ParseOptions(newlines_in_values=True)
+
+
+def _normalize_sku(sku):
+    """Normalize SKU (case-insensitive, strip whitespace)"""
+    import pyarrow.compute as pc
+    
+    return pc.utf8_upper(pc.utf8_trim_whitespace(sku))
+
+
+def _estimate_row_count(file_path: str, sample_size: int = 64 * 1024) -> int:
+    """
+    Estimate the number of data rows from the average line length of the
+    first sample_size bytes. When the whole file fits in the sample this is
+    an upper bound: physical lines are counted, and quoted multi-line values
+    span several of them
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    
+    lines = sample.count(b'\n')
+    if len(sample) == file_size:
+        if sample and not sample.endswith(b'\n'):
+            lines += 1
+        return max(lines - 1, 0)
+    
+    if not lines:
+        return 0
+    return max(int(file_size * lines / len(sample)) - 1, 0)
+
+
+def _read_csv_batches(file_path: str, block_size: int):
+    """
+    Stream the CSV file as Arrow record batches with a normalized SKU
+    Parsing is multithreaded in C++; values stay text for COPY
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+    
+    reader = pacsv.open_csv(
+        file_path,
+        read_options=pacsv.ReadOptions(block_size=block_size),
+        parse_options=_csv_parse_options(),
+        convert_options=_csv_convert_options(),
+    )
+    
+    for batch in reader:
+        yield pa.RecordBatch.from_arrays(
+            [_normalize_sku(batch.column('sku'))]
+            + [batch.column(column) for column in IMPORT_COLUMNS[1:]],
+            names=IMPORT_COLUMNS
+        )
+
+
+def _upsert_small_file(cursor, file_path: str) -> tuple:
+    """
+    Upsert a small CSV file with a single multi-row INSERT
+    Returns (rows read, rows upserted)
+    """
+    from psycopg2.extras import execute_values
+    from pyarrow import csv as pacsv
+    
+    table = pacsv.read_csv(
+        file_path,
+        parse_options=_csv_parse_options(),
+        convert_options=_csv_convert_options()
+    )
+    columns = [_normalize_sku(table.column('sku')).to_pylist()]
+    columns += [table.column(column).to_pylist() for column in IMPORT_COLUMNS[1:]]
+    
+    # Keyed by SKU so the last duplicate wins, as in the staging path
+    rows = list({row[0]: row for row in zip(*columns)}.values())
+    
+    # A small file fits in one page, so the whole upsert is a single round-trip
+    execute_values(
+        cursor,
+        f"""
+        {ASYNC_COMMIT}
+        INSERT INTO products (sku, name, description, price, is_active, created_at)
+        VALUES %s
+        {UPSERT_ON_CONFLICT}
+        """,
+        rows,
+        template="(%s, %s, %s, %s, TRUE, NOW())",
+        page_size=SMALL_IMPORT_ROWS
+    )
+    return table.num_rows, len(rows)
 
 
 @celery_app.task(bind=True, name='tasks.import_products')
@@ -33,6 +165,8 @@ def import_products_task(self: Task, file_path: str) -> dict:
     Import products from CSV file with progress tracking
     Uses PostgreSQL COPY for optimal performance
     """
+    from pyarrow import csv as pacsv
+    
     try:
         logger.info(f"Starting import from {file_path}")
         
@@ -40,39 +174,34 @@ def import_products_task(self: Task, file_path: str) -> dict:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        # Count total rows for progress tracking
-        total_rows = sum(1 for _ in open(file_path, 'r', encoding='utf-8')) - 1
+        # Estimate total rows for progress tracking without scanning the file;
+        # small files fit in one sample, which bounds the count from above
+        small_file = os.path.getsize(file_path) <= SMALL_IMPORT_BYTES
+        if small_file:
+            total_rows = _estimate_row_count(file_path, sample_size=SMALL_IMPORT_BYTES)
+        else:
+            total_rows = _estimate_row_count(file_path)
         logger.info(f"Total rows to process: {total_rows}")
         
-        # Read and process CSV in chunks
-        chunk_size = 10000
+        # Read and process CSV in blocks of this many bytes
+        block_size = 4 << 20
         processed = 0
         inserted = 0
         updated = 0
         
-        # Get database connection string
-        db_url = settings.DATABASE_URL.replace('postgresql://', '').replace('postgres://', '')
-        
-        for chunk_num, chunk in enumerate(pd.read_csv(file_path, chunksize=chunk_size, encoding='utf-8')):
-            logger.info(f"Processing chunk {chunk_num + 1}")
-            
-            # Data cleaning and normalization
-            chunk = chunk.fillna('')  # Replace NaN with empty string
-            
-            # Normalize SKU (case-insensitive, strip whitespace)
-            if 'sku' in chunk.columns:
-                chunk['sku'] = chunk['sku'].astype(str).str.upper().str.strip()
-            
-            # Remove duplicates within chunk (keep last)
-            chunk = chunk.drop_duplicates(subset=['sku'], keep='last')
-            
-            # Prepare data for PostgreSQL COPY with UPSERT
-            # We'll use a temp table approach for better performance
-            with psycopg2.connect(settings.DATABASE_URL) as conn:
-                with conn.cursor() as cursor:
-                    # Create temporary table
-                    cursor.execute("""
+        # Borrow a pooled connection so each import skips the connect handshake;
+        # closing it hands it back to the worker's SQLAlchemy pool
+        with closing(engine.raw_connection()) as conn:
+            with conn.cursor() as cursor:
+                if small_file and total_rows < SMALL_IMPORT_ROWS:
+                    processed, inserted = _upsert_small_file(cursor, file_path)
+                else:
+                    # Stage every chunk, then merge with a single UPSERT
+                    # seq preserves file order so the last duplicate SKU wins
+                    cursor.execute(f"""
+                        {ASYNC_COMMIT}
                         CREATE TEMP TABLE temp_products (
+                            seq BIGSERIAL,
                             sku VARCHAR(255),
                             name VARCHAR(500),
                             description TEXT,
@@ -80,49 +209,54 @@ def import_products_task(self: Task, file_path: str) -> dict:
                         ) ON COMMIT DROP;
                     """)
                     
-                    # Prepare data buffer
-                    buffer = StringIO()
-                    # Select only relevant columns
-                    columns_to_import = ['sku', 'name', 'description', 'price']
-                    chunk_subset = chunk[columns_to_import] if all(col in chunk.columns for col in columns_to_import) else chunk
+                    # One buffer is reused for every chunk
+                    buffer = BytesIO()
+                    write_options = pacsv.WriteOptions(include_header=False)
                     
-                    chunk_subset.to_csv(buffer, index=False, header=False, sep='\t')
-                    buffer.seek(0)
-                    
-                    # COPY data to temp table (extremely fast)
-                    cursor.copy_from(buffer, 'temp_products', sep='\t', null='')
+                    for chunk_num, batch in enumerate(_read_csv_batches(file_path, block_size)):
+                        logger.info(f"Processing chunk {chunk_num + 1}")
+                        
+                        buffer.seek(0)
+                        buffer.truncate(0)
+                        pacsv.write_csv(batch, buffer, write_options=write_options)
+                        buffer.seek(0)
+                        
+                        # COPY data to temp table (NULLs are written as empty fields)
+                        cursor.copy_expert(
+                            f"COPY temp_products ({', '.join(IMPORT_COLUMNS)}) FROM STDIN "
+                            "WITH (FORMAT csv, NULL '')",
+                            buffer
+                        )
+                        
+                        processed += batch.num_rows
+                        # The total is an estimate; never report fewer rows than read
+                        total_rows = max(total_rows, processed)
+                        # Hold back 100% until the UPSERT has been committed
+                        percent = min(int((processed / total_rows) * 100), 99)
+                        
+                        # Update task progress
+                        meta = {
+                            'current': processed,
+                            'total': total_rows,
+                            'percent': percent,
+                            'status': f'Processing... {processed}/{total_rows} rows'
+                        }
+                        self.update_state(state='PROGRESS', meta=meta)
+                        publish_progress(self.request.id, {'state': 'PROGRESS', **meta})
+                        
+                        logger.info(f"Progress: {percent}% ({processed}/{total_rows})")
                     
                     # UPSERT from temp table to main table
-                    cursor.execute("""
+                    cursor.execute(f"""
                         INSERT INTO products (sku, name, description, price, is_active, created_at)
-                        SELECT sku, name, description, price, TRUE, NOW()
+                        SELECT DISTINCT ON (sku) sku, name, description, price, TRUE, NOW()
                         FROM temp_products
-                        ON CONFLICT (sku) 
-                        DO UPDATE SET
-                            name = EXCLUDED.name,
-                            description = EXCLUDED.description,
-                            price = EXCLUDED.price,
-                            updated_at = NOW();
+                        ORDER BY sku, seq DESC
+                        {UPSERT_ON_CONFLICT};
                     """)
-                    
-                    inserted += cursor.rowcount
-                    conn.commit()
-            
-            processed += len(chunk)
-            percent = min(int((processed / total_rows) * 100), 100)
-            
-            # Update task progress
-            self.update_state(
-                state='PROGRESS',
-                meta={
-                    'current': processed,
-                    'total': total_rows,
-                    'percent': percent,
-                    'status': f'Processing... {processed}/{total_rows} rows'
-                }
-            )
-            
-            logger.info(f"Progress: {percent}% ({processed}/{total_rows})")
+                    inserted = cursor.rowcount
+                
+                conn.commit()
         
         # Cleanup uploaded file
         try:
@@ -145,6 +279,12 @@ def import_products_task(self: Task, file_path: str) -> dict:
         }
         
         logger.info(f"Import completed: {result}")
+        publish_progress(self.request.id, {
+            'state': 'SUCCESS',
+            'status': 'Complete!',
+            'percent': 100,
+            'result': result
+        })
         return result
         
     except Exception as e:
@@ -153,9 +293,32 @@ def import_products_task(self: Task, file_path: str) -> dict:
             state='FAILURE',
             meta={'error': str(e), 'status': 'Import failed'}
         )
+        publish_progress(self.request.id, {
+            'state': 'FAILURE',
+            'status': 'Failed',
+            'error': str(e)
+        })
         raise
 
 
+async def _post_webhooks(urls: list, event_type: str, payload: dict):
+    """POST an event to all webhook URLs concurrently over one pooled client"""
+    import httpx
+    
+    body = {'event': event_type, 'data': payload}
+    async with httpx.AsyncClient(timeout=5.0, http2=True) as client:
+        responses = await asyncio.gather(
+            *(client.post(url, json=body) for url in urls),
+            return_exceptions=True
+        )
+    
+    for url, response in zip(urls, responses):
+        if isinstance(response, Exception):
+            logger.error(f"Failed to trigger webhook {url}: {response}")
+        else:
+            logger.info(f"Webhook {url} responded with {response.status_code}")
+
+
 @celery_app.task(name='tasks.trigger_webhooks')
 def trigger_webhooks_async(event_type: str, payload: dict):
     """Trigger configured webhooks asynchronously"""
@@ -167,18 +330,11 @@ def trigger_webhooks_async(event_type: str, payload: dict):
             Webhook.event_type == event_type,
             Webhook.is_active == True
         ).all()
-        
-        for webhook in webhooks:
-            try:
-                with httpx.Client(timeout=5.0) as client:
-                    response = client.post(
-                        str(webhook.url),
-                        json={'event': event_type, 'data': payload}
-                    )
-                    logger.info(f"Webhook {webhook.url} responded with {response.status_code}")
-            except Exception as e:
-                logger.error(f"Failed to trigger webhook {webhook.url}: {e}")
+        urls = [str(webhook.url) for webhook in webhooks]
         
         db.close()
+        
+        if urls:
+            asyncio.run(_post_webhooks(urls, event_type, payload))
     except Exception as e:
         logger.error(f"Webhook trigger failed: {e}")